@@ -4,22 +4,54 @@
 from __future__ import annotations
 
 import argparse
+import heapq
 import json
 import re
 from datetime import date, datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 
-from lessons_lib import LEVEL_ORDER, collect_lessons
+from lessons_lib import LEVEL_ORDER, atomic_write_bytes, build_index, collect_lessons, dump_json, lesson_paths, write_index
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-def tokenize(text: str) -> list[str]:
-    return sorted({t for t in re.split(r"[\s\.,;:!\?\-_/\\]+", text.lower()) if len(t) >= 3})
+_TOKEN_SPLIT = re.compile(r"[\s\.,;:!\?\-_/\\]+")
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+@lru_cache(maxsize=4096)
+def tokenize(text: str) -> frozenset[str]:
+    return frozenset(t for t in _TOKEN_SPLIT.split(text.lower()) if len(t) >= 3)
+
+
+def build_matcher(tokens: frozenset[str]):
+    if ahocorasick is None or not tokens:
+        return None
+    automaton = ahocorasick.Automaton()
+    for i, t in enumerate(tokens):
+        automaton.add_word(t, i)
+    automaton.make_automaton()
+    return automaton
+
+
+def count_token_hits(hay: str, tokens: frozenset[str], matcher=None) -> int:
+    if matcher is None:
+        return sum(1 for t in tokens if t in hay)
+    return len({i for _, i in matcher.iter(hay)})
 
 
 def read_headings(path: Path) -> list[str]:
     if not path.exists():
         return []
-    return [line[3:].strip() for line in path.read_text(encoding="utf-8", errors="ignore").splitlines() if line.startswith("## ")]
+    headings: list[str] = []
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            if line.startswith("## "):
+                headings.append(line[3:].strip())
+    return headings
 
 
 def parse_iso_date(raw: str) -> date | None:
@@ -29,11 +61,10 @@ def parse_iso_date(raw: str) -> date | None:
         return None
 
 
-def recency_score(last_validated_at: str) -> int:
-    d = parse_iso_date(last_validated_at or "")
+def recency_score(d: date | None, today: date | None = None) -> int:
     if not d:
         return 0
-    age_days = (date.today() - d).days
+    age_days = ((today or date.today()) - d).days
     if age_days <= 30:
         return 3
     if age_days <= 90:
@@ -43,14 +74,7 @@ def recency_score(last_validated_at: str) -> int:
     return 0
 
 
-def score_entry(entry: dict, tokens: list[str]) -> tuple[int, dict]:
-    level = entry.get("level", "case")
-    level_weight = {"principle": 30, "pattern": 20, "case": 10}.get(level, 0)
-    status = entry.get("status", "candidate")
-    status_bonus = {"canonical": 4, "validated": 2, "candidate": 0, "retired": -999}.get(status, 0)
-    confidence = int(entry.get("confidence", 3))
-    transferability = int(entry.get("transferability", 3))
-
+def prepare_entry(entry: dict) -> tuple[str, set[str], date | None]:
     tags = [str(t).lower() for t in entry.get("tags", [])]
     hay = " ".join(
         [
@@ -60,9 +84,34 @@ def score_entry(entry: dict, tokens: list[str]) -> tuple[int, dict]:
             " ".join(tags),
         ]
     ).lower()
-    token_hits = sum(1 for t in tokens if t in hay)
-    tag_hits = sum(1 for t in tokens if t in tags)
-    rscore = recency_score(str(entry.get("last_validated_at", "")))
+    validated_at = parse_iso_date(str(entry.get("last_validated_at", "")))
+    return hay, set(tags), validated_at
+
+
+def score_entry(
+    entry: dict,
+    hay: str,
+    tags: set[str],
+    validated_at: date | None,
+    tokens: frozenset[str],
+    matcher=None,
+    today: date | None = None,
+) -> tuple[int, dict]:
+    status = entry.get("status", "candidate")
+    if status == "retired":
+        return 0, {"tokenHits": 0, "tagHits": 0, "recencyScore": 0, "levelWeight": 0, "statusBonus": 0}
+    level = entry.get("level", "case")
+    level_weight = {"principle": 30, "pattern": 20, "case": 10}.get(level, 0)
+    status_bonus = {"canonical": 4, "validated": 2, "candidate": 0}.get(status, 0)
+    confidence = int(entry.get("confidence", 3))
+    transferability = int(entry.get("transferability", 3))
+
+    if tokens:
+        token_hits = count_token_hits(hay, tokens, matcher)
+        tag_hits = sum(1 for t in tokens if t in tags)
+    else:
+        token_hits = tag_hits = 0
+    rscore = recency_score(validated_at, today)
 
     score = level_weight + (token_hits * 3) + (tag_hits * 2) + confidence + transferability + status_bonus + rscore
     detail = {
@@ -75,6 +124,19 @@ def score_entry(entry: dict, tokens: list[str]) -> tuple[int, dict]:
     return score, detail
 
 
+def rank_key(item: tuple) -> tuple:
+    entry = item[1]
+    return item[0], -LEVEL_ORDER.get(entry.get("level", "case"), 99), entry.get("id", "")
+
+
+def iter_ranked(items: list[tuple], head: int):
+    if len(items) <= head:
+        yield from sorted(items, key=rank_key, reverse=True)
+        return
+    yield from heapq.nlargest(head, items, key=rank_key)
+    yield from sorted(items, key=rank_key, reverse=True)[head:]
+
+
 def to_selection(entry: dict, score: int, detail: dict, reason: str) -> dict:
     out = {
         "id": entry.get("id"),
@@ -89,16 +151,35 @@ def to_selection(entry: dict, score: int, detail: dict, reason: str) -> dict:
     return out
 
 
+def index_is_fresh(index_path: Path, lessons_root: Path, entries: list[dict]) -> bool:
+    if not lessons_root.exists():
+        return True
+    paths = lesson_paths(lessons_root)
+    if len(paths) != len(entries):
+        return False
+    base = lessons_root.parent
+    if {p.relative_to(base).as_posix() for p in paths} != {e.get("path") for e in entries}:
+        return False
+    index_mtime = index_path.stat().st_mtime_ns
+    return all(p.stat().st_mtime_ns <= index_mtime for p in paths)
+
+
 def load_entries(repo_root: Path, lessons_root: Path, index_path: Path) -> tuple[list[dict], str]:
     if index_path.exists():
         try:
             raw = json.loads(index_path.read_text(encoding="utf-8"))
             entries = raw.get("lessons", [])
-            if isinstance(entries, list):
+            if isinstance(entries, list) and index_is_fresh(index_path, lessons_root, entries):
                 return entries, "index"
         except Exception:
             pass
-    return collect_lessons(lessons_root), "scan"
+    entries = collect_lessons(lessons_root)
+    if entries:
+        try:
+            write_index(build_index(entries), index_path)
+        except OSError:
+            pass
+    return entries, "scan"
 
 
 def main() -> int:
@@ -120,25 +201,28 @@ def main() -> int:
     if not index_path.is_absolute():
         index_path = repo_root / index_path
 
+    now_utc = datetime.now(timezone.utc)
+    today = now_utc.astimezone().date()
     tokens = tokenize(args.task)
+    matcher = build_matcher(tokens)
     entries, source = load_entries(repo_root, lessons_root, index_path)
 
+    prepped = [(entry, *prepare_entry(entry)) for entry in entries]
+
     candidates = []
-    for entry in entries:
-        score, detail = score_entry(entry, tokens)
+    for entry, hay, tags, validated_at in prepped:
+        score, detail = score_entry(entry, hay, tags, validated_at, tokens, matcher, today)
         if score <= 0:
             continue
-        if entry.get("status") == "retired":
-            continue
         candidates.append((score, entry, detail))
-    candidates.sort(key=lambda x: (x[0], -LEVEL_ORDER.get(x[1].get("level", "case"), 99), x[1].get("id", "")), reverse=True)
 
     quotas = {"principle": args.principles_max, "pattern": args.patterns_max, "case": args.cases_max}
     used = {"principle": 0, "pattern": 0, "case": 0}
     selected: list[dict] = []
     seen_ids: set[str] = set()
 
-    for score, entry, detail in candidates:
+    head = args.top + args.principles_max + args.patterns_max + args.cases_max
+    for score, entry, detail in iter_ranked(candidates, head):
         if len(selected) >= args.top:
             break
         level = entry.get("level", "case")
@@ -154,16 +238,12 @@ def main() -> int:
     fallback_used = False
     if len(selected) < args.top:
         fallback_used = True
-        validated = []
-        for entry in entries:
-            if entry.get("status") not in ("validated", "canonical"):
-                continue
-            if entry.get("status") == "retired":
-                continue
-            d = parse_iso_date(str(entry.get("last_validated_at", "")))
-            validated.append((d or date.min, entry))
-        validated.sort(key=lambda x: (x[0], -LEVEL_ORDER.get(x[1].get("level", "case"), 99), x[1].get("id", "")), reverse=True)
-        for _, entry in validated:
+        validated = [
+            (validated_at or date.min, entry, validated_at)
+            for entry, _, _, validated_at in prepped
+            if entry.get("status") in ("validated", "canonical")
+        ]
+        for _, entry, validated_at in iter_ranked(validated, args.top):
             if len(selected) >= args.top:
                 break
             lesson_id = str(entry.get("id", "")).strip()
@@ -173,7 +253,7 @@ def main() -> int:
                 to_selection(
                     entry,
                     score=0,
-                    detail={"tokenHits": 0, "tagHits": 0, "recencyScore": recency_score(str(entry.get("last_validated_at", ""))), "levelWeight": 0, "statusBonus": 0},
+                    detail={"tokenHits": 0, "tagHits": 0, "recencyScore": recency_score(validated_at, today), "levelWeight": 0, "statusBonus": 0},
                     reason="fallback_latest_validated",
                 )
             )
@@ -185,7 +265,7 @@ def main() -> int:
         for heading in headings[: args.top]:
             selected.append(
                 {
-                    "id": "legacy-" + re.sub(r"[^a-z0-9]+", "-", heading.lower()).strip("-"),
+                    "id": "legacy-" + _SLUG_RE.sub("-", heading.lower()).strip("-"),
                     "level": "legacy",
                     "status": "n/a",
                     "title": heading,
@@ -202,11 +282,11 @@ def main() -> int:
 
     out_dir = Path("logs/agent/preflight")
     out_dir.mkdir(parents=True, exist_ok=True)
-    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    stamp = now_utc.astimezone().strftime("%Y%m%d_%H%M%S")
     out_path = out_dir / f"preflight_{stamp}.json"
     result = {
         "task": args.task,
-        "tokens": tokens,
+        "tokens": sorted(tokens),
         "source": source,
         "indexPath": str(index_path),
         "matchCount": len(selected),
@@ -218,9 +298,9 @@ def main() -> int:
             "patternsMax": args.patterns_max,
             "casesMax": args.cases_max,
         },
-        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "generatedAt": now_utc.isoformat(),
     }
-    out_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    atomic_write_bytes(out_path, dump_json(result))
 
     print(f"Preflight artifact: {out_path.resolve()}")
     if selected:
@@ -11,6 +11,8 @@ import tempfile
 from datetime import datetime, timezone
 from pathlib import Path
 
+from lessons_lib import atomic_write_bytes, dump_json
+
 
 def load_json(path: Path) -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
@@ -30,66 +32,55 @@ def detect_changed_paths(repo_root: Path) -> list[str]:
     return []
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Semantic workflow guard (Codex subprocess).")
-    parser.add_argument("--task", required=True)
-    parser.add_argument("--repo-root", default=".")
-    parser.add_argument("--policy-path", default="scripts/config/agent/agent_workflow_policy.json")
-    parser.add_argument("--changed-paths", nargs="*", default=None)
-    parser.add_argument("--output-path", default=None)
-    args = parser.parse_args()
-
-    repo_root = Path(args.repo_root).resolve()
-    policy_path = repo_root / args.policy_path
-    policy = load_json(policy_path)
-    semantic = policy.get("semanticReview", {})
-
-    out_dir = repo_root / "logs" / "agent" / "guard"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    if args.output_path:
-        output_path = Path(args.output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-    else:
-        output_path = out_dir / f"semantic_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-
-    if not semantic.get("enabled", False):
-        result = {
-            "status": "SKIPPED",
-            "engine": "disabled",
-            "summary": "Semantic review disabled by policy.",
-            "findings": [],
-            "generatedAt": datetime.now(timezone.utc).isoformat(),
-        }
-        output_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
-        print(f"Semantic artifact: {output_path.resolve()}")
-        return 0
-
-    codex = shutil.which("codex")
-    if not codex:
-        raise SystemExit("codex CLI not found on PATH.")
-
-    changed_paths = list(args.changed_paths or [])
-    if not changed_paths:
-        changed_paths = detect_changed_paths(repo_root)
-    changed_text = "\n".join(changed_paths) if changed_paths else "<none>"
-
-    schema_path = repo_root / semantic.get("schemaPath", "scripts/config/agent/semantic_review_schema.json")
-    if not schema_path.exists():
-        raise SystemExit(f"Semantic schema not found: {schema_path}")
+def load_batch_tasks(path: Path) -> list[dict]:
+    tasks: list[dict] = []
+    for lineno, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as exc:
+            raise SystemExit(f"Batch task line {lineno} is not valid JSON: {exc}") from None
+        if not isinstance(item, dict) or not str(item.get("task", "")).strip():
+            raise SystemExit(f"Batch task line {lineno} must be an object with a non-empty 'task'.")
+        if item.get("changedPaths") is not None and not isinstance(item["changedPaths"], list):
+            raise SystemExit(f"Batch task line {lineno}: 'changedPaths' must be a list of paths.")
+        if item.get("outputPath") is not None and not isinstance(item["outputPath"], str):
+            raise SystemExit(f"Batch task line {lineno}: 'outputPath' must be a string.")
+        tasks.append(item)
+    if not tasks:
+        raise SystemExit(f"No tasks found in batch file: {path}")
+    return tasks
+
+
+def batch_schema(schema: dict, count: int) -> dict:
+    item = {k: v for k, v in schema.items() if k not in ("$schema", "title")}
+    return {
+        "$schema": schema.get("$schema", "https://json-schema.org/draft/2020-12/schema"),
+        "title": "WorkflowSemanticReviewBatch",
+        "type": "object",
+        "additionalProperties": False,
+        "required": ["reviews"],
+        "properties": {
+            "reviews": {"type": "array", "minItems": count, "maxItems": count, "items": item},
+        },
+    }
 
-    timeout_sec = int(semantic.get("timeoutSec", 180))
-    model = semantic.get("model", "")
-    max_findings = int(semantic.get("maxFindings", 6))
 
-    prompt = f"""You are a workflow compliance reviewer.
+def build_prompt(reviews: list[tuple[str, list[str]]], max_findings: int) -> str:
+    header = """You are a workflow compliance reviewer.
 
 Goal:
 - Review workflow/process risk for this task.
 - Focus on scope drift, missing spec updates, missing verification evidence, and unsafe operational behavior.
 - Do not invent repository facts; if uncertain, report uncertainty.
-
+"""
+    if len(reviews) == 1:
+        task, changed_paths = reviews[0]
+        changed_text = "\n".join(changed_paths) if changed_paths else "<none>"
+        return f"""{header}
 Task:
-{args.task}
+{task}
 
 Changed paths:
 {changed_text}
@@ -100,6 +91,25 @@ Instructions:
 - At most {max_findings} findings.
 """
 
+    blocks = []
+    for i, (task, changed_paths) in enumerate(reviews, start=1):
+        changed_text = "\n".join(changed_paths) if changed_paths else "<none>"
+        blocks.append(f"=== TASK {i} ===\nTask:\n{task}\n\nChanged paths:\n{changed_text}\n=== END TASK {i} ===")
+    tasks_text = "\n\n".join(blocks)
+    return f"""{header}
+Review each of the following {len(reviews)} tasks independently.
+
+{tasks_text}
+
+Instructions:
+- Return strictly valid JSON per the provided schema.
+- Return exactly {len(reviews)} entries in "reviews", one per task, in task order.
+- Keep findings concise and actionable.
+- At most {max_findings} findings per task.
+"""
+
+
+def run_codex(codex: str, repo_root: Path, model: str, schema_path: Path, prompt: str, timeout_sec: int) -> dict:
     with tempfile.NamedTemporaryFile(delete=False) as tmp_out:
         tmp_out_path = Path(tmp_out.name)
 
@@ -116,37 +126,122 @@ Instructions:
         cmd.extend(["-m", str(model)])
     cmd.extend(["--output-schema", str(schema_path), "-o", str(tmp_out_path), "-"])
 
-    proc = subprocess.run(
-        cmd,
-        input=prompt,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-        capture_output=True,
-        timeout=timeout_sec,
-        check=False,
-    )
-    if proc.returncode != 0:
-        err = (proc.stderr or "").strip()
-        raise SystemExit(f"codex exec failed (exit {proc.returncode}). {err}")
-
-    semantic_json = json.loads(tmp_out_path.read_text(encoding="utf-8"))
+    try:
+        proc = subprocess.run(
+            cmd,
+            input=prompt,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            capture_output=True,
+            timeout=timeout_sec,
+            check=False,
+        )
+        if proc.returncode != 0:
+            err = (proc.stderr or "").strip()
+            raise SystemExit(f"codex exec failed (exit {proc.returncode}). {err}")
+        return json.loads(tmp_out_path.read_text(encoding="utf-8"))
+    finally:
+        try:
+            tmp_out_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+
+def review_result(semantic_json: dict, model: str, changed_paths: list[str], generated_at: str) -> dict:
     findings = semantic_json.get("findings", [])
-    result = {
+    return {
         "status": "WARN" if findings else "PASS",
         "engine": "codex_subprocess",
         "model": model or None,
         "summary": semantic_json.get("summary", ""),
         "findings": findings,
         "changedPaths": changed_paths,
-        "generatedAt": datetime.now(timezone.utc).isoformat(),
+        "generatedAt": generated_at,
     }
-    output_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
-    try:
-        tmp_out_path.unlink(missing_ok=True)
-    except Exception:
-        pass
-    print(f"Semantic artifact: {output_path.resolve()}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Semantic workflow guard (Codex subprocess).")
+    task_group = parser.add_mutually_exclusive_group(required=True)
+    task_group.add_argument("--task")
+    task_group.add_argument("--batch-tasks-file", default=None, help="JSONL of {task, changedPaths?, outputPath?} reviewed in one Codex run")
+    parser.add_argument("--repo-root", default=".")
+    parser.add_argument("--policy-path", default="scripts/config/agent/agent_workflow_policy.json")
+    parser.add_argument("--changed-paths", nargs="*", default=None)
+    parser.add_argument("--output-path", default=None)
+    args = parser.parse_args()
+    if args.batch_tasks_file and args.output_path:
+        parser.error("--output-path applies to single-task mode; set outputPath per batch line instead.")
+
+    repo_root = Path(args.repo_root).resolve()
+    policy_path = repo_root / args.policy_path
+    policy = load_json(policy_path)
+    semantic = policy.get("semanticReview", {})
+
+    out_dir = repo_root / "logs" / "agent" / "guard"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    now_utc = datetime.now(timezone.utc)
+    stamp = now_utc.astimezone().strftime("%Y%m%d_%H%M%S")
+    generated_at = now_utc.isoformat()
+    if args.batch_tasks_file:
+        batch = load_batch_tasks(Path(args.batch_tasks_file))
+        output_paths = []
+        for i, item in enumerate(batch, start=1):
+            raw_out = item.get("outputPath")
+            output_paths.append(Path(raw_out) if raw_out else out_dir / f"semantic_{stamp}_{i:03d}.json")
+    else:
+        batch = [{"task": args.task}]
+        output_paths = [Path(args.output_path) if args.output_path else out_dir / f"semantic_{stamp}.json"]
+    for output_path in output_paths:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if not semantic.get("enabled", False):
+        result = {
+            "status": "SKIPPED",
+            "engine": "disabled",
+            "summary": "Semantic review disabled by policy.",
+            "findings": [],
+            "generatedAt": generated_at,
+        }
+        for output_path in output_paths:
+            atomic_write_bytes(output_path, dump_json(result))
+            print(f"Semantic artifact: {output_path.resolve()}")
+        return 0
+
+    codex = shutil.which("codex")
+    if not codex:
+        raise SystemExit("codex CLI not found on PATH.")
+
+    default_changed = list(args.changed_paths or [])
+    if not default_changed and any(not item.get("changedPaths") for item in batch):
+        default_changed = detect_changed_paths(repo_root)
+    reviews = [(str(item["task"]), [str(p) for p in item.get("changedPaths") or default_changed]) for item in batch]
+
+    schema_path = repo_root / semantic.get("schemaPath", "scripts/config/agent/semantic_review_schema.json")
+    if not schema_path.exists():
+        raise SystemExit(f"Semantic schema not found: {schema_path}")
+
+    timeout_sec = int(semantic.get("timeoutSec", 180))
+    model = semantic.get("model", "")
+    max_findings = int(semantic.get("maxFindings", 6))
+    prompt = build_prompt(reviews, max_findings)
+
+    if len(reviews) == 1:
+        results = [run_codex(codex, repo_root, model, schema_path, prompt, timeout_sec)]
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            batch_schema_path = Path(tmp_dir) / "semantic_review_batch_schema.json"
+            batch_schema_path.write_bytes(dump_json(batch_schema(load_json(schema_path), len(reviews))))
+            semantic_json = run_codex(codex, repo_root, model, batch_schema_path, prompt, timeout_sec)
+        results = semantic_json.get("reviews", [])
+        if len(results) != len(reviews):
+            raise SystemExit(f"codex returned {len(results)} reviews for {len(reviews)} tasks.")
+
+    for output_path, (_, changed_paths), semantic_json in zip(output_paths, reviews, results):
+        result = review_result(semantic_json, model, changed_paths, generated_at)
+        atomic_write_bytes(output_path, dump_json(result))
+        print(f"Semantic artifact: {output_path.resolve()}")
     return 0
 
 
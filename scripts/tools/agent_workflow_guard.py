@@ -4,18 +4,49 @@
 from __future__ import annotations
 
 import argparse
+import fnmatch
 import glob
 import json
+import os
 import subprocess
 import sys
-from datetime import datetime
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 
+from lessons_lib import atomic_write_bytes, dump_json
+
+
+@dataclass(slots=True)
+class Finding:
+    severity: str
+    code: str
+    message: str
+
 
 def load_json(path: Path) -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def newest_mtime(pattern_path: Path) -> float | None:
+    parent = pattern_path.parent
+    if any(ch in str(parent) for ch in "*?["):
+        mtimes = [Path(p).stat().st_mtime for p in glob.glob(pattern_path.as_posix())]
+        return max(mtimes, default=None)
+    if not parent.is_dir():
+        return None
+    name_pattern = pattern_path.name
+    newest = None
+    with os.scandir(parent) as it:
+        for entry in it:
+            if not fnmatch.fnmatch(entry.name, name_pattern) or not entry.is_file():
+                continue
+            mtime = entry.stat().st_mtime
+            if newest is None or mtime > newest:
+                newest = mtime
+    return newest
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Hybrid workflow guard.")
     parser.add_argument("--task", required=True)
@@ -26,12 +57,16 @@ def main() -> int:
     parser.add_argument("--skip-semantic", action="store_true")
     args = parser.parse_args()
 
+    now_utc = datetime.now(timezone.utc)
+    stamp = now_utc.astimezone().strftime("%Y%m%d_%H%M%S")
+    now_ts = now_utc.timestamp()
+
     repo_root = Path(args.repo_root).resolve()
     policy = load_json(repo_root / args.policy_path)
-    findings: list[dict] = []
+    findings: list[Finding] = []
 
     def add_finding(severity: str, code: str, message: str) -> None:
-        findings.append({"severity": severity, "code": code, "message": message})
+        findings.append(Finding(severity, code, message))
 
     for doc in policy.get("requiredDocs", []):
         if not (repo_root / doc).exists():
@@ -54,15 +89,14 @@ def main() -> int:
 
     preflight_cfg = policy.get("preflight", {})
     if preflight_cfg.get("required", False) and checks.get("requirePreflightArtifact", False):
-        pattern = str((repo_root / preflight_cfg.get("artifactGlob", "logs/agent/preflight/*.json")).as_posix())
-        files = [Path(p) for p in glob.glob(pattern)]
-        if not files:
-            add_finding("medium", "missing-preflight-artifact", f"No preflight artifact found matching: {pattern}")
+        pattern_path = repo_root / preflight_cfg.get("artifactGlob", "logs/agent/preflight/*.json")
+        latest_mtime = newest_mtime(pattern_path)
+        if latest_mtime is None:
+            add_finding("medium", "missing-preflight-artifact", f"No preflight artifact found matching: {pattern_path.as_posix()}")
         else:
             max_age = preflight_cfg.get("maxAgeHours")
             if max_age is not None:
-                latest = max(files, key=lambda p: p.stat().st_mtime)
-                age_h = (datetime.now().timestamp() - latest.stat().st_mtime) / 3600
+                age_h = (now_ts - latest_mtime) / 3600
                 if age_h > float(max_age):
                     add_finding("medium", "stale-preflight-artifact", f"Latest preflight artifact is stale ({age_h:.1f}h old).")
 
@@ -71,7 +105,7 @@ def main() -> int:
     if not args.skip_semantic and semantic_cfg.get("enabled", False):
         semantic_script = repo_root / "scripts/tools/agent_semantic_guard.py"
         if semantic_script.exists():
-            sem_out = repo_root / "logs" / "agent" / "guard" / f"semantic_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            sem_out = repo_root / "logs" / "agent" / "guard" / f"semantic_{stamp}.json"
             sem_out.parent.mkdir(parents=True, exist_ok=True)
             cmd = [
                 sys.executable,
@@ -103,7 +137,7 @@ def main() -> int:
     block_sev = {str(x).lower() for x in semantic_cfg.get("blockOnSeverity", [])}
     semantic_block = any(str(f.get("severity", "")).lower() in block_sev for f in semantic_result.get("findings", []))
 
-    det_high = sum(1 for f in findings if f["severity"] == "high")
+    det_high = sum(1 for f in findings if f.severity == "high")
     status = "PASS"
     if findings or semantic_result.get("findings"):
         status = "WARN"
@@ -112,21 +146,21 @@ def main() -> int:
 
     out_dir = repo_root / "logs" / "agent" / "guard"
     out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / f"guard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    out_path = out_dir / f"guard_{stamp}.json"
     result = {
         "status": status,
         "mode": args.mode,
         "task": args.task,
-        "deterministicFindings": findings,
+        "deterministicFindings": [asdict(f) for f in findings],
         "deterministicSummary": {
-            "high": sum(1 for f in findings if f["severity"] == "high"),
-            "medium": sum(1 for f in findings if f["severity"] == "medium"),
+            "high": det_high,
+            "medium": sum(1 for f in findings if f.severity == "medium"),
             "total": len(findings),
         },
         "semantic": semantic_result,
-        "generatedAt": datetime.now().isoformat(),
+        "generatedAt": now_utc.isoformat(),
     }
-    out_path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    atomic_write_bytes(out_path, dump_json(result))
     print(f"Guard artifact: {out_path.resolve()}")
     print(f"Guard status: {status} (det={len(findings)}, semantic={len(semantic_result.get('findings', []))})")
     return 2 if status == "BLOCK" else 0
@@ -7,7 +7,7 @@ import argparse
 from datetime import date
 from pathlib import Path
 
-from lessons_lib import build_index, collect_lessons, write_index
+from lessons_lib import CACHE_NAME, build_index, collect_lessons, write_index
 
 
 def write_if_missing(path: Path, content: str, force: bool) -> str:
@@ -31,6 +31,7 @@ def main() -> int:
     today = date.today().isoformat()
 
     templates: dict[Path, str] = {
+        lessons_root / ".gitignore": f"{CACHE_NAME}\n",
         lessons_root / "README.md": """# Lessons Hierarchy
 
 This folder stores structured lessons by abstraction level:
@@ -7,9 +7,11 @@ import argparse
 import re
 from pathlib import Path
 
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
 
 def slugify(name: str) -> str:
-    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+    slug = _SLUG_RE.sub("-", name.lower()).strip("-")
     return slug or "feature"
 
 
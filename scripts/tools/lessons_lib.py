@@ -4,28 +4,121 @@
 from __future__ import annotations
 
 import json
+import os
 import re
-from datetime import date, datetime
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 LEVELS = ("case", "pattern", "principle")
 LEVEL_ORDER = {level: idx for idx, level in enumerate(LEVELS)}
 STATUS_VALUES = ("candidate", "validated", "canonical", "retired")
 FOLDER_TO_LEVEL = {"cases": "case", "patterns": "pattern", "principles": "principle"}
 LEVEL_TO_FOLDER = {v: k for k, v in FOLDER_TO_LEVEL.items()}
+_INT_RE = re.compile(r"-?\d+")
+CACHE_NAME = ".index_cache.json"
+CACHE_VERSION = 2
+INDEX_PRETTY_MAX_LESSONS = 200
+_FM_KEYS = (
+    "id",
+    "level",
+    "status",
+    "tags",
+    "confidence",
+    "transferability",
+    "source_case_ids",
+    "last_validated_at",
+    "title",
+    "summary",
+)
+
+
+def dump_json(obj: Any, pretty: bool = True) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2) if pretty else orjson.dumps(obj)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+_TMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+
+
+def _open_temp(path: Path) -> tuple[int, str]:
+    # Mode 0o666 through os.open lets the kernel apply the current umask.
+    while True:
+        tmp = os.path.join(path.parent, f"{path.name}.{os.urandom(6).hex()}.tmp")
+        try:
+            return os.open(tmp, _TMP_FLAGS, 0o666), tmp
+        except FileExistsError:
+            continue
+
+
+_REPLACE_RETRY_DELAYS = (0.01, 0.02, 0.05, 0.1, 0.2)
+
+
+def _replace(tmp: str, path: Path) -> None:
+    # Windows refuses to replace a file another handle has open; readers
+    # hold it only briefly, so retry a few times before giving up.
+    for delay in _REPLACE_RETRY_DELAYS:
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            if os.name != "nt":
+                raise
+            time.sleep(delay)
+    os.replace(tmp, path)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    fd, tmp = _open_temp(path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        _replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
 
 def slugify(text: str) -> str:
-    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
-    return slug or "lesson"
+    out = bytearray()
+    pending_dash = False
+    for ch in text.lower().encode("ascii", "replace"):
+        if 97 <= ch <= 122 or 48 <= ch <= 57:
+            if pending_dash and out:
+                out.append(45)
+            out.append(ch)
+            pending_dash = False
+        else:
+            pending_dash = True
+    return out.decode("ascii") or "lesson"
 
 
 def parse_scalar(raw: str) -> Any:
     value = raw.strip()
-    if len(value) >= 2 and value[0] == value[-1] and value[0] in ("'", '"'):
-        return value[1:-1]
-    if value.startswith("[") and value.endswith("]"):
+    if not value:
+        return value
+    first = value[0]
+    if first in ("'", '"'):
+        if len(value) >= 2 and value[-1] == first:
+            return value[1:-1]
+    elif first == "[":
+        if value[-1] != "]":
+            return value
         inner = value[1:-1].strip()
         if not inner:
             return []
@@ -37,38 +130,44 @@ def parse_scalar(raw: str) -> Any:
             elif p:
                 out.append(p)
         return out
-    if re.fullmatch(r"-?\d+", value):
-        return int(value)
-    if value.lower() == "true":
-        return True
-    if value.lower() == "false":
-        return False
+    elif first == "-" or first.isdigit():
+        if _INT_RE.fullmatch(value):
+            return int(value)
+    elif first in "tTfF":
+        lowered = value.lower()
+        if lowered == "true":
+            return True
+        if lowered == "false":
+            return False
     return value
 
 
 def parse_frontmatter(path: Path) -> tuple[dict[str, Any], str]:
-    text = path.read_text(encoding="utf-8", errors="ignore")
-    lines = text.splitlines()
-    if not lines or lines[0].strip() != "---":
-        return {}, text
-
-    end_idx = None
-    for i in range(1, len(lines)):
-        if lines[i].strip() == "---":
-            end_idx = i
-            break
-    if end_idx is None:
-        return {}, text
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        first = f.readline()
+        if first.strip() != "---":
+            return {}, first + f.read()
+
+        head = [first]
+        meta_lines: list[str] = []
+        while True:
+            line = f.readline()
+            if not line:
+                return {}, "".join(head)
+            head.append(line)
+            if line.strip() == "---":
+                break
+            meta_lines.append(line)
+        body = f.read().strip()
 
     meta: dict[str, Any] = {}
-    for line in lines[1:end_idx]:
+    for line in meta_lines:
         if not line.strip() or line.strip().startswith("#"):
             continue
         if ":" not in line:
             continue
         k, v = line.split(":", 1)
         meta[k.strip()] = parse_scalar(v)
-    body = "\n".join(lines[end_idx + 1 :]).strip()
     return meta, body
 
 
@@ -85,25 +184,44 @@ def clamp_score(value: Any, fallback: int = 3) -> int:
 
 
 def normalize_tags(raw: Any) -> list[str]:
-    if raw is None:
-        return []
     if isinstance(raw, str):
-        parts = [x.strip() for x in raw.split(",")]
-        return sorted({x.lower() for x in parts if x})
-    if isinstance(raw, list):
-        return sorted({str(x).strip().lower() for x in raw if str(x).strip()})
-    return []
+        items: Any = raw.split(",")
+    elif isinstance(raw, list):
+        items = raw
+    else:
+        return []
+    seen: set[str] = set()
+    out: list[str] = []
+    for x in items:
+        tag = str(x).strip().lower()
+        if tag and tag not in seen:
+            seen.add(tag)
+            out.append(tag)
+    out.sort()
+    return out
 
 
 def normalize_case_ids(raw: Any) -> list[str]:
-    if raw is None:
-        return []
     if isinstance(raw, str):
-        parts = [x.strip() for x in raw.split(",")]
-        return sorted({x for x in parts if x})
-    if isinstance(raw, list):
-        return sorted({str(x).strip() for x in raw if str(x).strip()})
-    return []
+        items: Any = raw.split(",")
+    elif isinstance(raw, list):
+        items = raw
+    else:
+        return []
+    seen: set[str] = set()
+    out: list[str] = []
+    for x in items:
+        case_id = str(x).strip()
+        if case_id and case_id not in seen:
+            seen.add(case_id)
+            out.append(case_id)
+    out.sort()
+    return out
+
+
+@lru_cache(maxsize=1)
+def _today_iso() -> str:
+    return date.today().isoformat()
 
 
 def valid_date_or_today(raw: Any) -> str:
@@ -115,7 +233,7 @@ def valid_date_or_today(raw: Any) -> str:
                 return txt
             except ValueError:
                 pass
-    return date.today().isoformat()
+    return _today_iso()
 
 
 def detect_level(path: Path) -> str:
@@ -126,14 +244,20 @@ def detect_level(path: Path) -> str:
 def extract_title_summary(body: str, fallback_id: str) -> tuple[str, str]:
     title = ""
     summary = ""
-    for line in body.splitlines():
-        s = line.strip()
+    pos = 0
+    n = len(body)
+    while pos < n:
+        end = body.find("\n", pos)
+        if end < 0:
+            end = n
+        s = body[pos:end].strip()
+        pos = end + 1
         if not s:
             continue
         if s.startswith("# "):
             title = s[2:].strip()
             continue
-        if not summary and not s.startswith("#"):
+        if not s.startswith("#"):
             summary = s
             break
     if not title:
@@ -141,7 +265,23 @@ def extract_title_summary(body: str, fallback_id: str) -> tuple[str, str]:
     return title, summary
 
 
-def normalize_lesson_entry(path: Path, metadata: dict[str, Any], body: str, lessons_root: Path) -> dict[str, Any]:
+def _rel_posix(path: Path, base: Path, prefix: str | None = None) -> str:
+    text = str(path)
+    if prefix is None:
+        prefix = os.path.join(str(base), "")
+    if text.startswith(prefix):
+        rel = text[len(prefix) :]
+        return rel if os.sep == "/" else rel.replace(os.sep, "/")
+    return path.relative_to(base).as_posix()
+
+
+def normalize_lesson_entry(
+    path: Path,
+    metadata: dict[str, Any],
+    body: str,
+    lessons_root: Path,
+    rel_prefix: str | None = None,
+) -> dict[str, Any]:
     inferred_level = detect_level(path)
     lesson_id = str(metadata.get("id") or path.stem).strip()
     if not lesson_id:
@@ -165,7 +305,7 @@ def normalize_lesson_entry(path: Path, metadata: dict[str, Any], body: str, less
     title = str(metadata.get("title") or title).strip()
     summary = str(metadata.get("summary") or extracted_summary).strip()
 
-    rel_path = path.relative_to(lessons_root.parent).as_posix()
+    rel_path = _rel_posix(path, lessons_root.parent, rel_prefix)
     return {
         "id": lesson_id,
         "level": level,
@@ -181,36 +321,113 @@ def normalize_lesson_entry(path: Path, metadata: dict[str, Any], body: str, less
     }
 
 
-def collect_lessons(lessons_root: Path) -> list[dict[str, Any]]:
-    entries: list[dict[str, Any]] = []
-    if not lessons_root.exists():
-        return entries
+def _iter_md(root: str):
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".md"):
+                    yield entry.path
+
 
+def lesson_paths(lessons_root: Path) -> list[Path]:
+    paths: list[Path] = []
     for folder in ("cases", "patterns", "principles"):
         base = lessons_root / folder
-        if not base.exists():
+        if not base.is_dir():
             continue
-        for path in sorted(base.rglob("*.md")):
-            metadata, body = parse_frontmatter(path)
-            entries.append(normalize_lesson_entry(path, metadata, body, lessons_root))
+        paths.extend(Path(p) for p in sorted(_iter_md(str(base))))
+    return paths
 
-    entries.sort(key=lambda e: (LEVEL_ORDER.get(e["level"], 99), e["id"]))
+
+def parse_lesson(path: Path, lessons_root: Path, rel_prefix: str | None = None) -> dict[str, Any]:
+    metadata, body = parse_frontmatter(path)
+    return normalize_lesson_entry(path, metadata, body, lessons_root, rel_prefix)
+
+
+def _load_cache(path: Path) -> dict[str, Any]:
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(raw, dict) or raw.get("version") != CACHE_VERSION:
+        return {}
+    entries = raw.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def _save_cache(path: Path, cache: dict[str, Any]) -> None:
+    payload = {"version": CACHE_VERSION, "entries": cache}
+    try:
+        atomic_write_bytes(path, json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    except OSError:
+        pass
+
+
+def collect_lessons(lessons_root: Path) -> list[dict[str, Any]]:
+    if not lessons_root.exists():
+        return []
+
+    cache_path = lessons_root / CACHE_NAME
+    cache = _load_cache(cache_path)
+    updated: dict[str, Any] = {}
+    paths = lesson_paths(lessons_root)
+    rel_prefix = os.path.join(str(lessons_root.parent), "")
+    entries: list[dict[str, Any]] = [{} for _ in paths]
+    misses: list[tuple[int, str, list[int]]] = []
+    for i, path in enumerate(paths):
+        st = path.stat()
+        # Keyed like entry["path"], so a renamed or copied lessons root misses.
+        key = _rel_posix(path, lessons_root.parent, rel_prefix)
+        stamp = [st.st_mtime_ns, st.st_size]
+        hit = cache.get(key)
+        if isinstance(hit, dict) and hit.get("stamp") == stamp and isinstance(hit.get("entry"), dict):
+            entries[i] = hit["entry"]
+            updated[key] = hit
+        else:
+            misses.append((i, key, stamp))
+
+    if len(misses) > 1:
+        workers = min(8, (os.cpu_count() or 1) * 2, len(misses))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(lambda m: parse_lesson(paths[m[0]], lessons_root, rel_prefix), misses))
+    else:
+        parsed = [parse_lesson(paths[m[0]], lessons_root, rel_prefix) for m in misses]
+    today = _today_iso()
+    for (i, key, stamp), entry in zip(misses, parsed):
+        entries[i] = entry
+        # A missing or invalid last_validated_at falls back to today; caching it
+        # would pin that date, so today-dated entries are re-parsed each run.
+        if entry.get("last_validated_at") != today:
+            updated[key] = {"stamp": stamp, "entry": entry}
+
+    if updated != cache:
+        _save_cache(cache_path, updated)
+    sort_entries(entries)
     return entries
 
 
+def sort_entries(entries: list[dict[str, Any]]) -> None:
+    entries.sort(key=lambda e: (LEVEL_ORDER.get(e["level"], 99), e["id"]))
+
+
 def build_index(entries: list[dict[str, Any]]) -> dict[str, Any]:
+    by_level = dict.fromkeys(LEVELS, 0)
+    by_level.update(Counter(e["level"] for e in entries))
+    by_status = dict.fromkeys(STATUS_VALUES, 0)
+    by_status.update(Counter(e["status"] for e in entries))
     stats = {
         "total": len(entries),
-        "byLevel": {level: 0 for level in LEVELS},
-        "byStatus": {status: 0 for status in STATUS_VALUES},
+        "byLevel": by_level,
+        "byStatus": by_status,
     }
-    for e in entries:
-        stats["byLevel"][e["level"]] = stats["byLevel"].get(e["level"], 0) + 1
-        stats["byStatus"][e["status"]] = stats["byStatus"].get(e["status"], 0) + 1
 
     return {
         "schemaVersion": "1.0.0",
-        "generatedAt": datetime.utcnow().isoformat() + "Z",
+        "generatedAt": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
         "stats": stats,
         "lessons": entries,
     }
@@ -218,32 +435,20 @@ def build_index(entries: list[dict[str, Any]]) -> dict[str, Any]:
 
 def write_index(index: dict[str, Any], output_path: Path) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(json.dumps(index, indent=2), encoding="utf-8")
+    pretty = len(index.get("lessons", [])) < INDEX_PRETTY_MAX_LESSONS
+    atomic_write_bytes(output_path, dump_json(index, pretty=pretty))
 
 
 def metadata_to_frontmatter(metadata: dict[str, Any]) -> str:
-    keys = [
-        "id",
-        "level",
-        "status",
-        "tags",
-        "confidence",
-        "transferability",
-        "source_case_ids",
-        "last_validated_at",
-        "title",
-        "summary",
-    ]
-    lines = ["---"]
-    for k in keys:
+    parts = ["---\n"]
+    for k in _FM_KEYS:
         if k not in metadata:
             continue
         v = metadata[k]
         if isinstance(v, list):
-            inner = ", ".join(str(x) for x in v)
-            lines.append(f"{k}: [{inner}]")
+            parts.append(f"{k}: [{', '.join(map(str, v))}]\n")
         else:
-            lines.append(f"{k}: {v}")
-    lines.append("---")
-    return "\n".join(lines)
+            parts.append(f"{k}: {v}\n")
+    parts.append("---")
+    return "".join(parts)
 
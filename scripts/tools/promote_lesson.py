@@ -12,7 +12,9 @@ from lessons_lib import (
     build_index,
     collect_lessons,
     metadata_to_frontmatter,
+    parse_lesson,
     slugify,
+    sort_entries,
     write_index,
 )
 
@@ -96,7 +98,10 @@ Source case IDs: {", ".join(metadata['source_case_ids'])}
     target_path.write_text(metadata_to_frontmatter(metadata) + "\n\n" + content, encoding="utf-8")
     print(f"Created: {target_path.resolve()}")
 
-    updated_entries = collect_lessons(lessons_root)
+    new_entry = parse_lesson(target_path, lessons_root)
+    updated_entries = [e for e in entries if e["path"] != new_entry["path"]]
+    updated_entries.append(new_entry)
+    sort_entries(updated_entries)
     index = build_index(updated_entries)
     index_path = lessons_root / "index.json"
     write_index(index, index_path)
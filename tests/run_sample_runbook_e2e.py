@@ -3,23 +3,46 @@
 
 from __future__ import annotations
 
+import contextlib
+import io
 import json
+import os
 import shutil
 import subprocess
 import sys
 import tempfile
 from pathlib import Path
+from types import ModuleType
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
-PY = sys.executable
-
-
-def run(cmd: list[str], cwd: Path) -> subprocess.CompletedProcess[str]:
-    proc = subprocess.run(cmd, cwd=str(cwd), text=True, capture_output=True, encoding="utf-8", errors="replace")
-    if proc.returncode != 0:
-        raise RuntimeError(f"Command failed ({proc.returncode}): {' '.join(cmd)}\nSTDOUT:\n{proc.stdout}\nSTDERR:\n{proc.stderr}")
-    return proc
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "tools"))
+
+import agent_lessons_preflight  # noqa: E402
+import agent_workflow_guard  # noqa: E402
+import bootstrap_lessons_repo  # noqa: E402
+import init_feature_spec  # noqa: E402
+import promote_lesson  # noqa: E402
+import update_lessons_index  # noqa: E402
+
+
+def run_tool(module: ModuleType, argv: list[str], cwd: Path) -> str:
+    old_argv, old_cwd = sys.argv, os.getcwd()
+    out = io.StringIO()
+    sys.argv = [module.__file__ or module.__name__, *argv]
+    os.chdir(cwd)
+    try:
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+            try:
+                rc = module.main()
+            except SystemExit as exc:
+                rc = exc.code
+    finally:
+        sys.argv = old_argv
+        os.chdir(old_cwd)
+    if rc not in (0, None):
+        raise RuntimeError(f"Tool failed ({rc}): {module.__name__} {' '.join(argv)}\nOUTPUT:\n{out.getvalue()}")
+    return out.getvalue()
 
 
 def write_case(path: Path, lesson_id: str, title: str, tags: list[str]) -> None:
@@ -57,6 +80,29 @@ def latest_json(path: Path, glob_pattern: str) -> Path:
     return files[0]
 
 
+STUB_CODEX = """
+import json, re, sys
+args = sys.argv[1:]
+schema = json.loads(open(args[args.index("--output-schema") + 1], encoding="utf-8").read())
+tasks = re.findall(r"^Task:\\n(.*)$", sys.stdin.read(), flags=re.M)
+reviews = [{"summary": f"reviewed: {t}", "findings": []} for t in tasks]
+out = {"reviews": reviews} if "reviews" in schema.get("properties", {}) else reviews[0]
+open(args[args.index("-o") + 1], "w", encoding="utf-8").write(json.dumps(out))
+"""
+
+
+def write_stub_codex(bin_dir: Path) -> None:
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    script = bin_dir / "codex_stub.py"
+    script.write_text(STUB_CODEX, encoding="utf-8")
+    if os.name == "nt":
+        (bin_dir / "codex.cmd").write_text(f'@"{sys.executable}" "{script}" %*\r\n', encoding="utf-8")
+    else:
+        launcher = bin_dir / "codex"
+        launcher.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{script}" "$@"\n', encoding="utf-8")
+        launcher.chmod(0o755)
+
+
 def main() -> int:
     with tempfile.TemporaryDirectory(prefix="workflow-police-e2e-") as tmp:
         root = Path(tmp)
@@ -65,19 +111,18 @@ def main() -> int:
         shutil.copy2(REPO_ROOT / "scripts/config/agent/agent_workflow_policy.json", root / "scripts/config/agent/agent_workflow_policy.json")
         shutil.copy2(REPO_ROOT / "scripts/config/agent/semantic_review_schema.json", root / "scripts/config/agent/semantic_review_schema.json")
 
-        run([PY, str(REPO_ROOT / "scripts/tools/bootstrap_lessons_repo.py"), "--repo-root", str(root)], cwd=root)
-        run([PY, str(REPO_ROOT / "scripts/tools/init_feature_spec.py"), "--feature-name", "ssh-hardening", "--repo-root", str(root)], cwd=root)
+        run_tool(bootstrap_lessons_repo, ["--repo-root", str(root)], cwd=root)
+        run_tool(init_feature_spec, ["--feature-name", "ssh-hardening", "--repo-root", str(root)], cwd=root)
 
         write_case(root / "lessons/cases/case-ssh-key-acl.md", "case-ssh-key-acl", "SSH key ACL mismatch", ["ssh", "acl"])
         write_case(root / "lessons/cases/case-ssh-host-alias.md", "case-ssh-host-alias", "SSH host alias mismatch", ["ssh", "alias"])
         write_case(root / "lessons/cases/case-known-host-drift.md", "case-known-host-drift", "Known_hosts endpoint drift", ["ssh", "known_hosts"])
 
-        run([PY, str(REPO_ROOT / "scripts/tools/update_lessons_index.py"), "--repo-root", str(root)], cwd=root)
+        run_tool(update_lessons_index, ["--repo-root", str(root)], cwd=root)
 
-        run(
+        run_tool(
+            promote_lesson,
             [
-                PY,
-                str(REPO_ROOT / "scripts/tools/promote_lesson.py"),
                 "--repo-root",
                 str(root),
                 "--source-id",
@@ -92,10 +137,9 @@ def main() -> int:
             cwd=root,
         )
 
-        run(
+        run_tool(
+            promote_lesson,
             [
-                PY,
-                str(REPO_ROOT / "scripts/tools/promote_lesson.py"),
                 "--repo-root",
                 str(root),
                 "--source-id",
@@ -110,10 +154,9 @@ def main() -> int:
             cwd=root,
         )
 
-        run(
+        run_tool(
+            agent_lessons_preflight,
             [
-                PY,
-                str(REPO_ROOT / "scripts/tools/agent_lessons_preflight.py"),
                 "--repo-root",
                 str(root),
                 "--task",
@@ -130,10 +173,9 @@ def main() -> int:
         if "principle" not in levels and "pattern" not in levels:
             raise RuntimeError(f"Expected principle or pattern in preflight matches, got: {levels}")
 
-        run(
+        run_tool(
+            agent_workflow_guard,
             [
-                PY,
-                str(REPO_ROOT / "scripts/tools/agent_workflow_guard.py"),
                 "--repo-root",
                 str(root),
                 "--task",
@@ -149,6 +191,39 @@ def main() -> int:
         if guard.get("status") not in ("PASS", "WARN"):
             raise RuntimeError(f"Unexpected guard status: {guard.get('status')}")
 
+        write_stub_codex(root / "stub-bin")
+        batch_tasks = [
+            {"task": "review ssh alias change", "changedPaths": ["lessons/cases/case-ssh-host-alias.md"]},
+            {"task": "review key acl change", "changedPaths": ["lessons/cases/case-ssh-key-acl.md", "AGENTS.md"]},
+        ]
+        batch_file = root / "semantic_batch.jsonl"
+        batch_file.write_text("".join(json.dumps(t) + "\n" for t in batch_tasks), encoding="utf-8")
+        env = dict(os.environ, PATH=str(root / "stub-bin") + os.pathsep + os.environ.get("PATH", ""))
+        proc = subprocess.run(
+            [
+                sys.executable,
+                str(REPO_ROOT / "scripts/tools/agent_semantic_guard.py"),
+                "--repo-root",
+                str(root),
+                "--batch-tasks-file",
+                str(batch_file),
+            ],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Semantic batch failed ({proc.returncode}):\n{proc.stdout}{proc.stderr}")
+        semantic_artifacts = sorted((root / "logs/agent/guard").glob("semantic_*_0*.json"))
+        if [p.name[-8:] for p in semantic_artifacts] != ["001.json", "002.json"]:
+            raise RuntimeError(f"Expected one semantic artifact per batch task, got: {[p.name for p in semantic_artifacts]}")
+        for artifact, task in zip(semantic_artifacts, batch_tasks):
+            semantic = json.loads(artifact.read_text(encoding="utf-8"))
+            if semantic.get("summary") != f"reviewed: {task['task']}" or semantic.get("changedPaths") != task["changedPaths"]:
+                raise RuntimeError(f"Semantic artifact {artifact.name} does not match its task: {semantic}")
+
         print("E2E_OK")
     return 0
 
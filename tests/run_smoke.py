@@ -3,18 +3,20 @@
 
 from __future__ import annotations
 
-import py_compile
+import compileall
 import sys
 from pathlib import Path
 
 
 def main() -> int:
     root = Path(__file__).resolve().parents[1]
-    scripts = sorted((root / "scripts" / "tools").glob("*.py"))
+    tools_dir = root / "scripts" / "tools"
+    scripts = sorted(tools_dir.glob("*.py"))
     if not scripts:
         raise SystemExit("No Python scripts found under scripts/tools.")
+    if not compileall.compile_dir(str(tools_dir), maxlevels=0, quiet=1, workers=0):
+        raise SystemExit("Compilation failed under scripts/tools.")
     for script in scripts:
-        py_compile.compile(str(script), doraise=True)
         print(f"OK: {script.relative_to(root)}")
     print("SMOKE_OK")
     return 0
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""Focused behaviour checks for shared tool helpers."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "tools"))
+
+import agent_lessons_preflight  # noqa: E402
+import agent_semantic_guard  # noqa: E402
+import lessons_lib  # noqa: E402
+import safe_remove  # noqa: E402
+
+
+def check_concurrent_index_writes(tmp: Path) -> None:
+    index_path = tmp / "lessons" / "index.json"
+    payloads = [
+        lessons_lib.build_index([{"id": f"w{w}-{i}", "level": "case", "status": "candidate", "summary": "x" * 512} for i in range(200)])
+        for w in range(4)
+    ]
+    lessons_lib.write_index(payloads[0], index_path)
+
+    errors: list[str] = []
+    done = threading.Event()
+
+    def writer(payload: dict) -> None:
+        try:
+            for _ in range(50):
+                lessons_lib.write_index(payload, index_path)
+        except Exception as exc:
+            errors.append(f"writer: {exc!r}")
+
+    def reader() -> None:
+        while not done.is_set():
+            try:
+                json.loads(index_path.read_text(encoding="utf-8"))
+            except PermissionError:
+                # Windows denies opens that race a replace; only torn reads count.
+                if os.name != "nt":
+                    errors.append("reader: PermissionError")
+            except Exception as exc:
+                errors.append(f"reader: {exc!r}")
+
+    writers = [threading.Thread(target=writer, args=(p,)) for p in payloads]
+    read_thread = threading.Thread(target=reader)
+    read_thread.start()
+    for t in writers:
+        t.start()
+    for t in writers:
+        t.join()
+    done.set()
+    read_thread.join()
+
+    if errors:
+        raise RuntimeError(f"Overlapping index writes failed ({len(errors)}): {errors[:3]}")
+    leftovers = [p.name for p in index_path.parent.iterdir() if p.name.endswith(".tmp")]
+    if leftovers:
+        raise RuntimeError(f"Temp files left behind: {leftovers}")
+    print("OK: concurrent index writes")
+
+
+def check_index_cache_dates(tmp: Path) -> None:
+    lessons_root = tmp / "cache-lessons"
+    (lessons_root / "cases").mkdir(parents=True)
+    (lessons_root / "cases" / "dated.md").write_text(
+        "---\nid: dated\nlevel: case\nlast_validated_at: 2024-01-02\n---\n# Dated\n", encoding="utf-8"
+    )
+    (lessons_root / "cases" / "undated.md").write_text("---\nid: undated\nlevel: case\n---\n# Undated\n", encoding="utf-8")
+
+    lessons_lib.collect_lessons(lessons_root)
+    raw = json.loads((lessons_root / lessons_lib.CACHE_NAME).read_text(encoding="utf-8"))
+    if raw.get("version") != lessons_lib.CACHE_VERSION or sorted(raw.get("entries", {})) != ["cache-lessons/cases/dated.md"]:
+        raise RuntimeError(f"Unexpected cache contents: {raw}")
+
+    original = lessons_lib._today_iso
+    lessons_lib._today_iso = lambda: "2099-12-31"
+    try:
+        dates = {e["id"]: e["last_validated_at"] for e in lessons_lib.collect_lessons(lessons_root)}
+    finally:
+        lessons_lib._today_iso = original
+    if dates != {"dated": "2024-01-02", "undated": "2099-12-31"}:
+        raise RuntimeError(f"Fallback date was served from cache: {dates}")
+
+    (lessons_root / lessons_lib.CACHE_NAME).write_text(json.dumps({"cases/dated.md": {}}), encoding="utf-8")
+    if len(lessons_lib.collect_lessons(lessons_root)) != 2:
+        raise RuntimeError("Unversioned cache file was not ignored")
+
+    moved_root = lessons_root.rename(tmp / "cache-memory")
+    copied_root = tmp / "cache-kb"
+    shutil.copytree(moved_root, copied_root)
+    for root in (moved_root, copied_root):
+        paths = sorted(e["path"] for e in lessons_lib.collect_lessons(root))
+        expected = [f"{root.name}/cases/dated.md", f"{root.name}/cases/undated.md"]
+        if paths != expected:
+            raise RuntimeError(f"Stale cached paths after moving the lessons root: {paths}")
+    print("OK: index cache dates and version")
+
+
+def check_safe_remove_trees(tmp: Path) -> None:
+    tree = tmp / "rm-tree"
+    (tree / "a" / "b" / "c").mkdir(parents=True)
+    for rel in ("top.txt", "a/one.txt", "a/b/two.txt", "a/b/c/three.txt"):
+        (tree / rel).write_text(rel, encoding="utf-8")
+    if safe_remove.remove_path(tree, recursive=False) != f"skip-dir-requires-recursive: {tree}":
+        raise RuntimeError("Directory removed without --recursive")
+    safe_remove.remove_path(tree, recursive=True)
+    if tree.exists():
+        raise RuntimeError("Nested tree was not removed")
+
+    target = tmp / "rm-target"
+    (target / "keep").mkdir(parents=True)
+    (target / "keep" / "data.txt").write_text("keep", encoding="utf-8")
+    holder = tmp / "rm-holder"
+    holder.mkdir()
+    try:
+        (holder / "linked").symlink_to(target, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        print("OK: safe_remove nested tree (symlink checks skipped)")
+        return
+    safe_remove.remove_path(holder, recursive=True)
+    if holder.exists() or not (target / "keep" / "data.txt").is_file():
+        raise RuntimeError("Symlinked child was followed during recursive removal")
+
+    link_root = tmp / "rm-link-root"
+    link_root.symlink_to(target, target_is_directory=True)
+    try:
+        safe_remove.remove_path(link_root, recursive=True)
+    except OSError:
+        pass
+    else:
+        raise RuntimeError("Recursive removal through a symlink root did not fail")
+    if not (target / "keep" / "data.txt").is_file():
+        raise RuntimeError("Symlink root target was modified")
+    print("OK: safe_remove nested tree and symlinks")
+
+
+def check_preflight_index_rename(tmp: Path) -> None:
+    lessons_root = tmp / "rename-repo" / "lessons"
+    (lessons_root / "cases").mkdir(parents=True)
+    old = lessons_root / "cases" / "old-name.md"
+    old.write_text("---\nid: renamed\nlevel: case\nlast_validated_at: 2024-01-02\n---\n# Renamed\n", encoding="utf-8")
+    index_path = lessons_root / "index.json"
+    lessons_lib.write_index(lessons_lib.build_index(lessons_lib.collect_lessons(lessons_root)), index_path)
+
+    entries, source = agent_lessons_preflight.load_entries(lessons_root.parent, lessons_root, index_path)
+    if source != "index":
+        raise RuntimeError(f"Fresh index was not used: {source}")
+
+    new = old.with_name("new-name.md")
+    old.rename(new)
+    entries, source = agent_lessons_preflight.load_entries(lessons_root.parent, lessons_root, index_path)
+    if source != "scan" or [e["path"] for e in entries] != ["lessons/cases/new-name.md"]:
+        raise RuntimeError(f"Renamed lesson served from stale index: {source} {[e['path'] for e in entries]}")
+    print("OK: preflight index detects renames")
+
+
+def check_batch_task_validation(tmp: Path) -> None:
+    batch_file = tmp / "batch.jsonl"
+    bad_lines = {
+        '{"task": "a", "changedPaths": "scripts/x.py"}': "line 2: 'changedPaths'",
+        '{"task": "a", "outputPath": 3}': "line 2: 'outputPath'",
+        "{not json": "line 2 is not valid JSON",
+    }
+    for bad, expected in bad_lines.items():
+        batch_file.write_text('{"task": "ok"}\n' + bad + "\n", encoding="utf-8")
+        try:
+            agent_semantic_guard.load_batch_tasks(batch_file)
+        except SystemExit as exc:
+            if expected not in str(exc.code):
+                raise RuntimeError(f"Unexpected batch error for {bad!r}: {exc.code}")
+        else:
+            raise RuntimeError(f"Malformed batch line accepted: {bad!r}")
+    print("OK: batch task validation")
+
+
+def check_dump_json_encoders() -> None:
+    sample = {"lessons": [{"id": "café", "title": "Ünïcode — ✓", "tags": [], "meta": {}, "confidence": 3}], "ok": True, "none": None}
+    original = lessons_lib.orjson
+    try:
+        lessons_lib.orjson = None
+        fallback = {pretty: lessons_lib.dump_json(sample, pretty=pretty) for pretty in (True, False)}
+    finally:
+        lessons_lib.orjson = original
+    if "café".encode("utf-8") not in fallback[True] or b"\\u" in fallback[False]:
+        raise RuntimeError("Fallback encoder escaped non-ASCII text")
+    if original is not None:
+        for pretty, data in fallback.items():
+            if lessons_lib.dump_json(sample, pretty=pretty) != data:
+                raise RuntimeError(f"orjson and stdlib encoders differ (pretty={pretty})")
+    print("OK: dump_json encoders emit identical UTF-8")
+
+
+def main() -> int:
+    check_dump_json_encoders()
+    with tempfile.TemporaryDirectory(prefix="workflow-police-checks-") as tmp:
+        root = Path(tmp)
+        check_concurrent_index_writes(root)
+        check_index_cache_dates(root)
+        check_safe_remove_trees(root)
+        check_preflight_index_rename(root)
+        check_batch_task_validation(root)
+    print("CHECKS_OK")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())